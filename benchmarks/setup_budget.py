@@ -0,0 +1,136 @@
+"""Import time budget and setup checks for the Verme Automation integration.
+
+Run from the repository root in an environment with Home Assistant installed:
+
+    python benchmarks/setup_budget.py
+
+The script exits non-zero when importing the integration exceeds its budget,
+when async_setup_entry suspends instead of returning straight away (it must
+leave all broker I/O to a background task), or when either pulls in paho.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "custom_components.verme_automation"
+
+# Budget in seconds
+IMPORT_BUDGET = 0.05
+
+IMPORT_RUNS = 5
+
+# Home Assistant modules the integration imports; they are loaded before the
+# timer starts so only the integration's own import cost is measured
+_HA_PRELOAD = """
+import voluptuous
+import homeassistant.components.persistent_notification
+import homeassistant.config_entries
+import homeassistant.core
+import homeassistant.exceptions
+import homeassistant.helpers.config_validation
+import homeassistant.helpers.device_registry
+import homeassistant.helpers.dispatcher
+import homeassistant.helpers.entity_platform
+import homeassistant.helpers.event
+"""
+
+_IMPORT_PROBE = f"""
+{_HA_PRELOAD}
+import sys
+import time
+started = time.perf_counter()
+import {PACKAGE}
+print(time.perf_counter() - started)
+print("paho.mqtt.client" in sys.modules)
+"""
+
+
+def measure_import() -> tuple[float, bool]:
+    """Return the best import time over fresh interpreters and whether paho was loaded."""
+    timings = []
+    paho_loaded = False
+    for _ in range(IMPORT_RUNS):
+        result = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        elapsed, loaded = result.stdout.split()
+        timings.append(float(elapsed))
+        paho_loaded |= loaded == "True"
+    return min(timings), paho_loaded
+
+
+def _fake_hass() -> MagicMock:
+    """Return a stand-in hass that records calls without doing any I/O."""
+    hass = MagicMock()
+    hass.data = {}
+    hass.services.has_service.return_value = False
+    return hass
+
+
+def _fake_entry(index: int) -> MagicMock:
+    """Return a stand-in config entry."""
+    entry = MagicMock()
+    # The background connect is never run; only its creation is checked
+    entry.async_create_background_task.side_effect = lambda hass, coro, name: coro.close()
+    entry.entry_id = f"bench_{index}"
+    entry.title = "Verme Automation (bench)"
+    entry.data = {
+        "mqtt_host": "192.0.2.1",
+        "mqtt_port": 1883,
+        "mqtt_username": "",
+        "mqtt_password": "",
+    }
+    return entry
+
+
+def setup_returns_immediately() -> bool:
+    """Return True if async_setup_entry completes without suspending.
+
+    The coroutine is stepped once by hand: with no running event loop,
+    any await on I/O, a sleep or a task would suspend it here.
+    """
+    integration = __import__(PACKAGE, fromlist=["async_setup_entry"])
+    entry = _fake_entry(0)
+    coro = integration.async_setup_entry(_fake_hass(), entry)
+    try:
+        coro.send(None)
+    except StopIteration:
+        return entry.async_create_background_task.called
+    coro.close()
+    return False
+
+
+def main() -> int:
+    """Run the benchmark and report budget violations."""
+    sys.path.insert(0, str(ROOT))
+    failures = []
+
+    import_time, paho_on_import = measure_import()
+    print(f"import:  {import_time * 1000:.2f} ms (budget {IMPORT_BUDGET * 1000:.2f} ms)")
+    if import_time > IMPORT_BUDGET:
+        failures.append("import time over budget")
+    if paho_on_import:
+        failures.append("paho imported at module import time")
+
+    immediate = setup_returns_immediately()
+    print(f"setup:   {'returns without awaiting' if immediate else 'awaits during setup'}")
+    if not immediate:
+        failures.append("async_setup_entry awaits instead of connecting in the background")
+    if "paho.mqtt.client" in sys.modules:
+        failures.append("paho imported during async_setup_entry")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,23 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Callable
+import importlib
 import json
 import logging
-from typing import Any
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any
 
-import paho.mqtt.client as mqtt
+import voluptuous as vol
+from homeassistant.components import persistent_notification
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.device_registry import DeviceRegistry
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -19,17 +29,83 @@ from .const import (
     CONF_MQTT_PORT,
     CONF_MQTT_USERNAME,
     CONF_MQTT_PASSWORD,
+    CONF_MQTT_TLS,
     MQTT_BASE_TOPIC,
     MQTT_SHADES_TOPIC,
     MQTT_NODE_SUFFIX,
     NODE_TYPE_SHADE,
     MANUFACTURER,
     MODEL_SHADE,
+    SERVICE_SET_PROFILING,
+    SERVICE_DUMP_PROFILE,
+    ATTR_ENABLED,
+    ATTR_SAMPLE_RATE,
+    ATTR_TOP,
+    DEFAULT_PROFILE_TOP,
+    DISCOVERY_BATCH_DELAY,
+    SERVICE_SET_CAPTURE,
+    SERVICE_REPLAY_CAPTURE,
+    ATTR_PATH,
+    ATTR_MAX_BYTES,
+    ATTR_BACKUPS,
+    ATTR_SPEED,
+    DEFAULT_CAPTURE_FILE,
+    DEFAULT_CAPTURE_MAX_BYTES,
+    DEFAULT_CAPTURE_BACKUPS,
+    DEVICE_TYPE_PLATFORMS,
+    DEFAULT_DEVICE_PLATFORMS,
+    SIGNAL_NEW_DEVICE,
+    SIGNAL_DEVICE_UPDATED,
+    NOTIFICATION_MAX_NAMES,
 )
+from .capture import (
+    DIRECTION_IN,
+    DIRECTION_OUT,
+    CaptureWriter,
+    async_replay,
+    read_capture,
+)
+from .profiler import CallbackProfiler
+
+if TYPE_CHECKING:
+    import paho.mqtt.client as mqtt
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[str] = ["cover", "update"]
+SET_PROFILING_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENABLED): cv.boolean,
+        vol.Optional(ATTR_SAMPLE_RATE, default=1): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+SET_CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENABLED): cv.boolean,
+        vol.Optional(ATTR_PATH): cv.string,
+        vol.Optional(ATTR_MAX_BYTES, default=DEFAULT_CAPTURE_MAX_BYTES): vol.All(
+            vol.Coerce(int), vol.Range(min=1024)
+        ),
+        vol.Optional(ATTR_BACKUPS, default=DEFAULT_CAPTURE_BACKUPS): vol.All(
+            vol.Coerce(int), vol.Range(min=0)
+        ),
+    }
+)
+
+REPLAY_CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_PATH): cv.string,
+        vol.Optional(ATTR_SPEED, default=1.0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+DUMP_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_TOP, default=DEFAULT_PROFILE_TOP): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    }
+)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -40,11 +116,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     coordinator = VermeAutomationCoordinator(hass, entry)
     hass.data[DOMAIN][entry.entry_id] = coordinator
     
-    # Connect to MQTT
-    await coordinator.async_connect()
+    # Connect to MQTT in the background so a slow broker does not hold up
+    # bootstrap; platforms are forwarded once a device of their type appears
+    coordinator.async_start()
     
-    # Forward the setup to the cover platform
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _async_register_services(hass)
     
     return True
 
@@ -54,13 +130,103 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     coordinator = hass.data[DOMAIN][entry.entry_id]
     await coordinator.async_disconnect()
     
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        entry, list(coordinator.loaded_platforms)
+    )
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_SET_PROFILING)
+            hass.services.async_remove(DOMAIN, SERVICE_DUMP_PROFILE)
+            hass.services.async_remove(DOMAIN, SERVICE_SET_CAPTURE)
+            hass.services.async_remove(DOMAIN, SERVICE_REPLAY_CAPTURE)
     
     return unload_ok
 
 
+@callback
+def _async_register_services(hass: HomeAssistant) -> None:
+    """Register the debug services shared by all config entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_SET_PROFILING):
+        return
+    
+    @callback
+    def async_set_profiling(call: ServiceCall) -> None:
+        """Enable or disable MQTT callback profiling."""
+        for coordinator in hass.data[DOMAIN].values():
+            coordinator.profiler.configure(call.data[ATTR_ENABLED], call.data[ATTR_SAMPLE_RATE])
+    
+    @callback
+    def async_dump_profile(call: ServiceCall) -> None:
+        """Log the hottest MQTT handlers for every config entry."""
+        for coordinator in hass.data[DOMAIN].values():
+            _LOGGER.warning(
+                "MQTT callback profile for %s: %s",
+                coordinator.entry.title,
+                coordinator.profiler.report(call.data[ATTR_TOP]),
+            )
+    
+    @callback
+    def async_resolve_path(path: str) -> str:
+        """Resolve a capture path against the config directory and check access.
+        
+        Paths inside the config directory, where captures are written by
+        default, are always accepted; anything else must be allowlisted.
+        """
+        full_path = os.path.realpath(hass.config.path(path))
+        config_dir = os.path.realpath(hass.config.config_dir)
+        if os.path.commonpath([full_path, config_dir]) != config_dir and not (
+            hass.config.is_allowed_path(full_path)
+        ):
+            raise HomeAssistantError(f"Access to {path} is not allowed")
+        return full_path
+    
+    async def async_set_capture(call: ServiceCall) -> None:
+        """Start or stop capturing MQTT traffic."""
+        user_path = None
+        if ATTR_PATH in call.data:
+            user_path = async_resolve_path(call.data[ATTR_PATH])
+        for coordinator in hass.data[DOMAIN].values():
+            if not call.data[ATTR_ENABLED]:
+                await coordinator.async_stop_capture()
+                continue
+            # Default to one capture file per config entry
+            path = user_path or hass.config.path(
+                DEFAULT_CAPTURE_FILE.format(entry_id=coordinator.entry.entry_id)
+            )
+            await coordinator.async_start_capture(
+                path, call.data[ATTR_MAX_BYTES], call.data[ATTR_BACKUPS]
+            )
+    
+    async def async_replay_capture(call: ServiceCall) -> None:
+        """Replay a capture file through every config entry at the same time."""
+        path = async_resolve_path(call.data[ATTR_PATH])
+        coordinators = list(hass.data[DOMAIN].values())
+        counts = await asyncio.gather(
+            *(
+                coordinator.async_replay_capture(path, call.data[ATTR_SPEED])
+                for coordinator in coordinators
+            )
+        )
+        for coordinator, count in zip(coordinators, counts):
+            _LOGGER.warning(
+                "Replayed %d messages from %s into %s", count, path, coordinator.entry.title
+            )
+    
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_PROFILING, async_set_profiling, schema=SET_PROFILING_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_DUMP_PROFILE, async_dump_profile, schema=DUMP_PROFILE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_CAPTURE, async_set_capture, schema=SET_CAPTURE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_REPLAY_CAPTURE, async_replay_capture, schema=REPLAY_CAPTURE_SCHEMA
+    )
+
+
 class VermeAutomationCoordinator:
     """Coordinate MQTT communication for Verme Automation."""
     
@@ -71,7 +237,42 @@ class VermeAutomationCoordinator:
         self.mqtt_client: mqtt.Client | None = None
         self.devices: dict[str, dict[str, Any]] = {}
         self._listeners: list[callback] = []
+        self.profiler = CallbackProfiler()
         
+        # Messages handed off from the paho thread to the event loop
+        self._queue: list[tuple[float, Callable[[Any], None], Any]] = []
+        self._queue_lock = threading.Lock()
+        self._drain_scheduled = False
+        
+        # Discovered devices waiting for the batched registry flush
+        self._pending_devices: dict[str, tuple[str, dict[str, Any], bool]] = {}
+        self._cancel_discovery_flush: CALLBACK_TYPE | None = None
+        self._new_device_count = 0
+        
+        # Exact-topic handlers registered by entities
+        # Handler tuples are replaced, never mutated, so the paho thread can
+        # read them without a lock
+        self._subscriptions: dict[str, tuple[Callable[[Any], None], ...]] = {}
+        self._capture: CaptureWriter | None = None
+        
+        # Platforms forwarded so far; they are set up on first use
+        self.loaded_platforms: set[str] = set()
+        self._platform_lock = asyncio.Lock()
+        self.signal_new_device = SIGNAL_NEW_DEVICE.format(entry_id=entry.entry_id)
+        self._connect_task: asyncio.Task | None = None
+        
+        # Background work that must not outlive the entry
+        self._tasks: set[asyncio.Task] = set()
+        self._stopped = False
+        
+    @callback
+    def async_start(self) -> None:
+        """Start connecting to the MQTT broker without waiting for it."""
+        # A background task, so a slow broker does not hold up Home Assistant startup
+        self._connect_task = self.entry.async_create_background_task(
+            self.hass, self.async_connect(), name=f"verme_automation connect {self.entry.entry_id}"
+        )
+    
     async def async_connect(self) -> None:
         """Connect to MQTT broker."""
         def on_connect(client, userdata, flags, rc):
@@ -81,95 +282,318 @@ class VermeAutomationCoordinator:
                 # Subscribe to all Verme node discovery topics
                 client.subscribe(f"{MQTT_BASE_TOPIC}/+/+/{MQTT_NODE_SUFFIX}")
                 _LOGGER.info("Subscribed to Verme node discovery topics")
+                # Restore entity subscriptions made before (re)connecting
+                for topic in list(self._subscriptions):
+                    client.subscribe(topic)
             else:
                 _LOGGER.error("Failed to connect to MQTT broker: %s", rc)
         
         def on_message(client, userdata, msg):
-            """Handle incoming MQTT messages."""
-            try:
-                topic_parts = msg.topic.split("/")
-                if len(topic_parts) >= 4 and topic_parts[-1] == MQTT_NODE_SUFFIX:
-                    device_type = topic_parts[1]  # e.g., "shades"
-                    device_id = topic_parts[2]    # e.g., "shade_001"
-                    
-                    # Parse the JSON payload
-                    try:
-                        node_info = json.loads(msg.payload.decode())
-                        _LOGGER.info("Discovered Verme device: %s", node_info)
-                        
-                        # Store device info
-                        self.devices[device_id] = {
-                            "type": device_type,
-                            "info": node_info,
-                            "topic_base": f"{MQTT_BASE_TOPIC}/{device_type}/{device_id}"
-                        }
-                        
-                        # Notify Home Assistant about the new device
-                        self.hass.async_create_task(
-                            self._async_handle_new_device(device_id, device_type, node_info)
-                        )
-                        
-                    except json.JSONDecodeError:
-                        _LOGGER.error("Invalid JSON in node info message: %s", msg.payload)
-                        
-            except Exception as err:
-                _LOGGER.error("Error processing MQTT message: %s", err)
-        
-        # Create MQTT client
-        self.mqtt_client = mqtt.Client()
-        self.mqtt_client.on_connect = on_connect
-        self.mqtt_client.on_message = on_message
-        
-        # Set credentials if provided
-        if self.entry.data[CONF_MQTT_USERNAME] and self.entry.data[CONF_MQTT_PASSWORD]:
-            self.mqtt_client.username_pw_set(
-                self.entry.data[CONF_MQTT_USERNAME],
-                self.entry.data[CONF_MQTT_PASSWORD]
-            )
+            """Hand incoming MQTT messages over to the event loop."""
+            if self._capture is not None:
+                self._capture.record(DIRECTION_IN, msg.topic, msg.payload, msg.retain)
+            self._dispatch_message(msg)
         
-        # Connect to broker
-        await self.hass.async_add_executor_job(
-            self.mqtt_client.connect,
-            self.entry.data[CONF_MQTT_HOST],
-            self.entry.data[CONF_MQTT_PORT],
-            60
-        )
+        def create_client() -> mqtt.Client:
+            """Import paho and start a client; runs in the executor."""
+            mqtt_client = importlib.import_module("paho.mqtt.client")
+            client = mqtt_client.Client()
+            client.on_connect = on_connect
+            client.on_message = on_message
+            
+            # Set credentials if provided
+            if self.entry.data[CONF_MQTT_USERNAME] and self.entry.data[CONF_MQTT_PASSWORD]:
+                client.username_pw_set(
+                    self.entry.data[CONF_MQTT_USERNAME],
+                    self.entry.data[CONF_MQTT_PASSWORD]
+                )
+            
+            # Enable TLS if requested (entries created before TLS support lack the key)
+            if self.entry.data.get(CONF_MQTT_TLS):
+                client.tls_set()
+            
+            # The network loop connects, and reconnects, in its own thread
+            client.connect_async(
+                self.entry.data[CONF_MQTT_HOST],
+                self.entry.data[CONF_MQTT_PORT],
+                60
+            )
+            client.loop_start()
+            return client
         
-        # Start the MQTT loop
-        await self.hass.async_add_executor_job(self.mqtt_client.loop_start)
+        try:
+            self.mqtt_client = await self.hass.async_add_executor_job(create_client)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error("Failed to start MQTT client: %s", err)
+    
+    @callback
+    def _async_track_task(self, coro: Any, name: str) -> None:
+        """Run a coroutine as a background task that async_disconnect cancels."""
+        task = self.entry.async_create_background_task(self.hass, coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
     
     async def async_disconnect(self) -> None:
         """Disconnect from MQTT broker."""
+        self._stopped = True
+        # Let a platform forward that already started finish, so it is
+        # recorded in loaded_platforms and gets unloaded with the entry
+        async with self._platform_lock:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.async_stop_capture()
+        if self._connect_task is not None:
+            # Creating the client is quick; wait so it cannot outlive the entry
+            await self._connect_task
+            self._connect_task = None
+        if self._cancel_discovery_flush is not None:
+            self._cancel_discovery_flush()
+            self._cancel_discovery_flush = None
         if self.mqtt_client:
             await self.hass.async_add_executor_job(self.mqtt_client.loop_stop)
             await self.hass.async_add_executor_job(self.mqtt_client.disconnect)
     
-    async def _async_handle_new_device(self, device_id: str, device_type: str, node_info: dict) -> None:
-        """Handle discovery of a new device."""
-        device_registry = dr.async_get(self.hass)
+    def _enqueue(self, handler: Callable[[Any], None], msg: Any) -> None:
+        """Queue a message for handling on the event loop.
         
-        # Create device in device registry
-        device_registry.async_get_or_create(
-            config_entry_id=self.entry.entry_id,
-            identifiers={(DOMAIN, device_id)},
-            manufacturer=MANUFACTURER,
-            model=MODEL_SHADE if device_type == "shades" else f"Verme {device_type.title()}",
-            name=node_info.get("name", f"Verme {device_id}"),
-            sw_version=node_info.get("version"),
-        )
+        Called from the paho thread. Messages arriving while a drain is
+        already scheduled join the same batch.
+        """
+        with self._queue_lock:
+            self._queue.append((time.monotonic(), handler, msg))
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        self.hass.loop.call_soon_threadsafe(self._async_drain_queue)
+    
+    @callback
+    def _async_drain_queue(self) -> None:
+        """Run all queued message handlers on the event loop."""
+        with self._queue_lock:
+            batch, self._queue = self._queue, []
+            self._drain_scheduled = False
+        if self._stopped:
+            return
+        
+        profiler = self.profiler
+        profiler.record_batch(len(batch))
+        for queued_at, handler, msg in batch:
+            if not profiler.should_sample():
+                self._run_handler(handler, msg)
+                continue
+            started = time.monotonic()
+            self._run_handler(handler, msg)
+            profiler.record(handler.__qualname__, time.monotonic() - started, started - queued_at)
+    
+    @staticmethod
+    def _run_handler(handler: Callable[[Any], None], msg: Any) -> None:
+        """Run one message handler, logging any error it raises."""
+        try:
+            handler(msg)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error("Error processing MQTT message on %s: %s", msg.topic, err)
+    
+    def _dispatch_message(self, msg: Any) -> None:
+        """Route an inbound message to its handlers.
+        
+        This is the single entry point for live traffic from the paho thread
+        and for replayed captures, so both exercise the same code path.
+        """
+        handlers = self._subscriptions.get(msg.topic)
+        if handlers:
+            for handler in handlers:
+                self._enqueue(handler, msg)
+        elif msg.topic.endswith(f"/{MQTT_NODE_SUFFIX}"):
+            self._enqueue(self._handle_node_message, msg)
+    
+    @callback
+    def subscribe(self, topic: str, handler: Callable[[Any], None]) -> CALLBACK_TYPE:
+        """Subscribe to a topic and run handler on the event loop for each message.
+        
+        Returns a callable that removes the subscription again.
+        """
+        self._subscriptions[topic] = (*self._subscriptions.get(topic, ()), handler)
+        if self.mqtt_client:
+            self.mqtt_client.subscribe(topic)
+        
+        @callback
+        def unsubscribe() -> None:
+            """Remove the handler and drop the broker subscription when unused."""
+            handlers = tuple(
+                existing for existing in self._subscriptions.get(topic, ()) if existing != handler
+            )
+            if handlers:
+                self._subscriptions[topic] = handlers
+                return
+            self._subscriptions.pop(topic, None)
+            if self.mqtt_client:
+                self.mqtt_client.unsubscribe(topic)
         
-        # Create a persistent notification for the user
-        self.hass.components.persistent_notification.async_create(
-            f"New Verme device discovered: {node_info.get('name', device_id)}",
-            title="Verme Automation - New Device",
-            notification_id=f"verme_new_device_{device_id}"
+        return unsubscribe
+    
+    async def async_start_capture(self, path: str, max_bytes: int, backups: int) -> None:
+        """Start recording Verme MQTT traffic to a capture file."""
+        await self.async_stop_capture()
+        self._capture = await self.hass.async_add_executor_job(
+            CaptureWriter, path, max_bytes, backups
         )
+        _LOGGER.info("Capturing Verme MQTT traffic to %s", path)
+    
+    async def async_stop_capture(self) -> None:
+        """Stop recording MQTT traffic."""
+        capture, self._capture = self._capture, None
+        if capture is not None:
+            await self.hass.async_add_executor_job(capture.close)
+            _LOGGER.info("Stopped capturing Verme MQTT traffic to %s", capture.path)
+    
+    async def async_replay_capture(self, path: str, speed: float) -> int:
+        """Replay the inbound messages of a capture file through the dispatch path."""
+        records = await self.hass.async_add_executor_job(read_capture, path)
+        return await async_replay(records, self._dispatch_message, speed)
+    
+    @callback
+    def _handle_node_message(self, msg: Any) -> None:
+        """Handle a node discovery message."""
+        if self._stopped:
+            return
+        topic_parts = msg.topic.split("/")
+        if len(topic_parts) >= 4 and topic_parts[-1] == MQTT_NODE_SUFFIX:
+            device_type = topic_parts[1]  # e.g., "shades"
+            device_id = topic_parts[2]    # e.g., "shade_001"
+            
+            # Parse the JSON payload
+            try:
+                node_info = json.loads(msg.payload.decode())
+            except json.JSONDecodeError:
+                _LOGGER.error("Invalid JSON in node info message: %s", msg.payload)
+                return
+            
+            # Retained node messages are re-sent on every reconnect; skip the
+            # registry entirely when nothing the registry cares about changed
+            known = self.devices.get(device_id)
+            is_new = known is None
+            unchanged = (
+                known is not None
+                and known["info"].get("name") == node_info.get("name")
+                and known["info"].get("version") == node_info.get("version")
+            )
+            
+            # Store device info; known devices are updated in place because
+            # their entities hold a reference to this dict
+            if is_new:
+                self.devices[device_id] = {
+                    "type": device_type,
+                    "info": node_info,
+                    "topic_base": f"{MQTT_BASE_TOPIC}/{device_type}/{device_id}"
+                }
+            else:
+                known["info"] = node_info
+            
+            if is_new:
+                self._async_track_task(
+                    self._async_add_device(device_type),
+                    f"verme_automation add {device_type} {device_id}",
+                )
+            
+            if unchanged:
+                return
+            
+            # Let existing entities pick up the new name or version
+            if not is_new:
+                async_dispatcher_send(
+                    self.hass,
+                    SIGNAL_DEVICE_UPDATED.format(
+                        entry_id=self.entry.entry_id, device_id=device_id
+                    ),
+                )
+            
+            _LOGGER.info("Discovered Verme device: %s", node_info)
+            
+            # Registry writes are batched so a commissioning run causes one flush.
+            # Whether the device is new is decided now, because its entities may
+            # register it before the flush runs.
+            if device_id not in self._pending_devices:
+                registered = dr.async_get(self.hass).async_get_device(
+                    identifiers={(DOMAIN, device_id)}
+                )
+                self._pending_devices[device_id] = (device_type, node_info, registered is None)
+            else:
+                first_seen_new = self._pending_devices[device_id][2]
+                self._pending_devices[device_id] = (device_type, node_info, first_seen_new)
+            if self._cancel_discovery_flush is None:
+                self._cancel_discovery_flush = async_call_later(
+                    self.hass, DISCOVERY_BATCH_DELAY, self._async_flush_discovery
+                )
+    
+    async def _async_add_device(self, device_type: str) -> None:
+        """Make sure the platforms for a device type are set up and announce it."""
+        await self._async_ensure_platforms(
+            DEVICE_TYPE_PLATFORMS.get(device_type, DEFAULT_DEVICE_PLATFORMS)
+        )
+        if not self._stopped:
+            async_dispatcher_send(self.hass, self.signal_new_device)
+    
+    async def _async_ensure_platforms(self, platforms: list[str]) -> None:
+        """Forward the given platforms the first time they are needed."""
+        async with self._platform_lock:
+            missing = [platform for platform in platforms if platform not in self.loaded_platforms]
+            if not missing or self._stopped:
+                return
+            # Import platform modules off the event loop before HA looks them up
+            for platform in missing:
+                await self.hass.async_add_executor_job(
+                    importlib.import_module, f".{platform}", __package__
+                )
+            # The entry may have been unloaded while the imports ran
+            if self._stopped:
+                return
+            await self.hass.config_entries.async_forward_entry_setups(self.entry, missing)
+            self.loaded_platforms.update(missing)
+    
+    async def _async_flush_discovery(self, _now: Any = None) -> None:
+        """Write pending discovered devices to the device registry."""
+        self._cancel_discovery_flush = None
+        pending, self._pending_devices = self._pending_devices, {}
+        device_registry = dr.async_get(self.hass)
+        new_names: list[str] = []
+        
+        for device_id, (device_type, node_info, first_seen_new) in pending.items():
+            name = node_info.get("name", f"Verme {device_id}")
+            sw_version = node_info.get("version")
+            device = device_registry.async_get_device(identifiers={(DOMAIN, device_id)})
+            
+            if device is None:
+                # Create device in device registry
+                device_registry.async_get_or_create(
+                    config_entry_id=self.entry.entry_id,
+                    identifiers={(DOMAIN, device_id)},
+                    manufacturer=MANUFACTURER,
+                    model=MODEL_SHADE if device_type == "shades" else f"Verme {device_type.title()}",
+                    name=name,
+                    sw_version=sw_version,
+                )
+            elif device.name != name or device.sw_version != sw_version:
+                device_registry.async_update_device(device.id, name=name, sw_version=sw_version)
+            
+            if first_seen_new:
+                new_names.append(name)
         
-        # If it's a shade, reload the cover platform to pick up the new device
-        if device_type == "shades":
-            await self.hass.config_entries.async_reload(self.entry.entry_id)
+        if new_names:
+            # One rolling notification, replaced in place as more devices appear
+            self._new_device_count += len(new_names)
+            persistent_notification.async_create(
+                self.hass,
+                f"{self._new_device_count} new Verme device(s) discovered. "
+                f"Latest: {', '.join(new_names[-NOTIFICATION_MAX_NAMES:])}",
+                title="Verme Automation - New Devices",
+                notification_id=f"verme_new_devices_{self.entry.entry_id}"
+            )
     
     def publish_message(self, topic: str, payload: str, retain: bool = False) -> None:
         """Publish a message to MQTT."""
+        if self._capture is not None:
+            self._capture.record(DIRECTION_OUT, topic, payload, retain)
         if self.mqtt_client:
             self.mqtt_client.publish(topic, payload, retain=retain)
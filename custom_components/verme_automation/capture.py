@@ -0,0 +1,162 @@
+"""MQTT traffic capture and replay for Verme Automation.
+
+Captures are append-only files holding one small binary record per
+message, so a retained flood or an OTA progress storm can be recorded on
+a live system and replayed later without a broker.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+import os
+import struct
+import threading
+import time
+from typing import Any, BinaryIO
+
+CAPTURE_MAGIC = b"VMC1"
+
+DIRECTION_IN = 0
+DIRECTION_OUT = 1
+
+# timestamp, direction, retain, topic length, payload length
+_RECORD_HEADER = struct.Struct("<dBBHI")
+
+
+@dataclass
+class CaptureRecord:
+    """One captured MQTT message.
+
+    The topic, payload, qos and retain attributes mirror paho's
+    MQTTMessage so records can be handed straight to message handlers.
+    """
+
+    timestamp: float
+    direction: int
+    topic: str
+    payload: bytes
+    retain: bool
+    qos: int = 0
+
+
+class CaptureWriter:
+    """Append captured messages to a size-bounded, rotating file.
+
+    Records are written from the paho thread and executor jobs, so all
+    file access is serialized with a lock. Never use it from the event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int) -> None:
+        """Open the capture file for appending."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._file: BinaryIO | None = None
+        self._open()
+
+    def _open(self) -> None:
+        """Open the capture file, writing the magic header if it is new."""
+        self._file = open(self.path, "ab")  # pylint: disable=consider-using-with
+        if self._file.tell() == 0:
+            self._file.write(CAPTURE_MAGIC)
+            self._file.flush()
+
+    def _rotate(self) -> None:
+        """Shift path -> path.1 -> ... -> path.N and start a new file."""
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def record(self, direction: int, topic: str, payload: bytes | str, retain: bool) -> None:
+        """Append one message to the capture."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        raw_topic = topic.encode()
+        data = (
+            _RECORD_HEADER.pack(time.time(), direction, retain, len(raw_topic), len(payload))
+            + raw_topic
+            + payload
+        )
+        with self._lock:
+            if self._file is None:
+                return
+            size = self._file.tell()
+            if size > len(CAPTURE_MAGIC) and size + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            # Flush every record so a crash keeps the tail of the incident and
+            # a capture can be replayed while it is still being written
+            self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the capture file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_capture(path: str) -> list[CaptureRecord]:
+    """Read all records from a capture file.
+
+    A record truncated by a crash mid-write is dropped.
+    """
+    with open(path, "rb") as capture:
+        data = capture.read()
+    if not data.startswith(CAPTURE_MAGIC):
+        raise ValueError(f"{path} is not a Verme capture file")
+
+    records: list[CaptureRecord] = []
+    offset = len(CAPTURE_MAGIC)
+    while offset + _RECORD_HEADER.size <= len(data):
+        timestamp, direction, retain, topic_length, payload_length = _RECORD_HEADER.unpack_from(
+            data, offset
+        )
+        offset += _RECORD_HEADER.size
+        end = offset + topic_length + payload_length
+        if end > len(data):
+            break
+        topic = data[offset : offset + topic_length].decode(errors="replace")
+        records.append(
+            CaptureRecord(timestamp, direction, topic, data[offset + topic_length : end], bool(retain))
+        )
+        offset = end
+    return records
+
+
+async def async_replay(
+    records: list[CaptureRecord],
+    dispatch: Callable[[CaptureRecord], Any],
+    speed: float = 1.0,
+) -> int:
+    """Feed inbound records to dispatch and return how many were replayed.
+
+    With ``speed`` 1.0 the original inter-message timing is reproduced;
+    larger values replay faster and 0 replays as fast as possible.
+    """
+    inbound = [record for record in records if record.direction == DIRECTION_IN]
+    if not inbound:
+        return 0
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first = inbound[0].timestamp
+    for count, record in enumerate(inbound, 1):
+        if speed > 0:
+            delay = started + (record.timestamp - first) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif count % 1000 == 0:
+            # Yield now and then so the handlers queued so far get to run
+            await asyncio.sleep(0)
+        dispatch(record)
+    return len(inbound)
@@ -2,10 +2,10 @@
 from __future__ import annotations
 
 import logging
+import ssl
 from typing import Any
 
 import voluptuous as vol
-import paho.mqtt.client as mqtt
 
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
@@ -18,8 +18,14 @@ from .const import (
     CONF_MQTT_PORT,
     CONF_MQTT_USERNAME,
     CONF_MQTT_PASSWORD,
+    CONF_MQTT_TLS,
     DEFAULT_MQTT_PORT,
+    DEFAULT_MQTT_TLS,
+    PROBE_TIMEOUT,
+    PROBE_RETAINED_WINDOW,
+    PROBE_RETAINED_LIMIT,
 )
+from .probe import ProbeAuthError, ProbeError, async_probe_broker
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,6 +35,7 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Optional(CONF_MQTT_PORT, default=DEFAULT_MQTT_PORT): int,
         vol.Required(CONF_MQTT_USERNAME): str,
         vol.Required(CONF_MQTT_PASSWORD): str,
+        vol.Optional(CONF_MQTT_TLS, default=DEFAULT_MQTT_TLS): bool,
     }
 )
 
@@ -38,37 +45,51 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
-    
-    def test_connection():
-        """Test MQTT connection."""
-        client = mqtt.Client()
-        
-        try:
-            if data[CONF_MQTT_USERNAME] and data[CONF_MQTT_PASSWORD]:
-                client.username_pw_set(
-                    data[CONF_MQTT_USERNAME], 
-                    data[CONF_MQTT_PASSWORD]
-                )
-            
-            client.connect(
-                data[CONF_MQTT_HOST], 
-                data[CONF_MQTT_PORT], 
-                60
-            )
-            client.disconnect()
-            return True
-        except Exception as err:
-            _LOGGER.error("Failed to connect to MQTT broker: %s", err)
-            return False
-    
-    # Test the connection in the executor to avoid blocking
-    connection_result = await hass.async_add_executor_job(test_connection)
-    
-    if not connection_result:
-        raise CannotConnect
-    
+    ssl_context = None
+    if data.get(CONF_MQTT_TLS):
+        # Loading the default CA bundle touches the disk
+        ssl_context = await hass.async_add_executor_job(ssl.create_default_context)
+
+    try:
+        result = await async_probe_broker(
+            data[CONF_MQTT_HOST],
+            data[CONF_MQTT_PORT],
+            data[CONF_MQTT_USERNAME],
+            data[CONF_MQTT_PASSWORD],
+            ssl_context=ssl_context,
+            timeout=PROBE_TIMEOUT,
+            retained_window=PROBE_RETAINED_WINDOW,
+            retained_limit=PROBE_RETAINED_LIMIT,
+        )
+    except ProbeAuthError as err:
+        _LOGGER.error("MQTT broker rejected credentials: %s", err)
+        raise InvalidAuth from err
+    except ProbeError as err:
+        _LOGGER.error("Failed to connect to MQTT broker: %s", err)
+        raise CannotConnect from err
+
+    if not result.node_topics_allowed:
+        _LOGGER.warning(
+            "MQTT broker %s refused the subscription to Verme node topics; "
+            "check the broker ACL for this user",
+            data[CONF_MQTT_HOST],
+        )
+
+    _LOGGER.debug(
+        "Probed MQTT broker %s: connect %.0f ms, round trip %.0f ms, %d retained nodes",
+        data[CONF_MQTT_HOST],
+        result.connect_latency * 1000,
+        result.round_trip_latency * 1000,
+        result.retained_nodes,
+    )
+
     # Return info that you want to store in the config entry.
-    return {"title": f"Verme Automation ({data[CONF_MQTT_HOST]})"}
+    return {
+        "title": f"Verme Automation ({data[CONF_MQTT_HOST]})",
+        "devices": result.retained_nodes,
+        "connect_ms": round(result.connect_latency * 1000),
+        "round_trip_ms": round(result.round_trip_latency * 1000),
+    }
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -76,6 +97,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._user_input: dict[str, Any] = {}
+        self._info: dict[str, Any] = {}
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -87,16 +113,43 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 info = await validate_input(self.hass, user_input)
             except CannotConnect:
                 errors["base"] = "cannot_connect"
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
-                return self.async_create_entry(title=info["title"], data=user_input)
+                self._user_input = user_input
+                self._info = info
+                return await self.async_step_confirm()
 
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Show the probe results before creating the entry."""
+        if user_input is not None:
+            return self.async_create_entry(
+                title=self._info["title"], data=self._user_input
+            )
+
+        return self.async_show_form(
+            step_id="confirm",
+            description_placeholders={
+                "host": self._user_input[CONF_MQTT_HOST],
+                "devices": str(self._info["devices"]),
+                "connect_ms": str(self._info["connect_ms"]),
+                "round_trip_ms": str(self._info["round_trip_ms"]),
+            },
+        )
+
 
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
+
+
+class InvalidAuth(HomeAssistantError):
+    """Error to indicate the broker rejected the credentials."""
@@ -12,9 +12,16 @@ CONF_MQTT_HOST = "mqtt_host"
 CONF_MQTT_PORT = "mqtt_port"
 CONF_MQTT_USERNAME = "mqtt_username"
 CONF_MQTT_PASSWORD = "mqtt_password"
+CONF_MQTT_TLS = "mqtt_tls"
 
 # Default values
 DEFAULT_MQTT_PORT = 1883
+DEFAULT_MQTT_TLS = False
+
+# Broker probe used by the config flow (seconds)
+PROBE_TIMEOUT = 10.0
+PROBE_RETAINED_WINDOW = 1.0
+PROBE_RETAINED_LIMIT = 5.0
 
 # MQTT Topics
 MQTT_BASE_TOPIC = "verme"
@@ -30,3 +37,32 @@ NODE_TYPE_SHADE = "shade"
 # Device info
 MANUFACTURER = "Verme"
 MODEL_SHADE = "Verme Shade"
+
+# Discovery batching
+DISCOVERY_BATCH_DELAY = 2.0  # seconds to collect node messages before touching the registry
+NOTIFICATION_MAX_NAMES = 10
+
+# Platforms forwarded for each device type, on first discovery
+DEVICE_TYPE_PLATFORMS = {"shades": ["cover", "update"]}
+DEFAULT_DEVICE_PLATFORMS = ["update"]
+SIGNAL_NEW_DEVICE = "verme_automation_new_device_{entry_id}"
+SIGNAL_DEVICE_UPDATED = "verme_automation_device_updated_{entry_id}_{device_id}"
+
+# Debug services
+SERVICE_SET_PROFILING = "set_profiling"
+SERVICE_DUMP_PROFILE = "dump_profile"
+ATTR_ENABLED = "enabled"
+ATTR_SAMPLE_RATE = "sample_rate"
+ATTR_TOP = "top"
+DEFAULT_PROFILE_TOP = 10
+
+# Traffic capture and replay
+SERVICE_SET_CAPTURE = "set_capture"
+SERVICE_REPLAY_CAPTURE = "replay_capture"
+ATTR_PATH = "path"
+ATTR_MAX_BYTES = "max_bytes"
+ATTR_BACKUPS = "backups"
+ATTR_SPEED = "speed"
+DEFAULT_CAPTURE_FILE = "verme_capture_{entry_id}.bin"
+DEFAULT_CAPTURE_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_CAPTURE_BACKUPS = 3
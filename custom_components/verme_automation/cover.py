@@ -12,6 +12,7 @@ from homeassistant.components.cover import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import DeviceInfo
 
@@ -21,6 +22,7 @@ from .const import (
     MQTT_STATE_SUFFIX,
     MANUFACTURER,
     MODEL_SHADE,
+    SIGNAL_DEVICE_UPDATED,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -33,11 +35,16 @@ async def async_setup_entry(
 ) -> None:
     """Set up Verme cover entities from a config entry."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    added: set[str] = set()
     
-    # Create cover entities for all discovered shade devices
-    entities = []
-    for device_id, device_data in coordinator.devices.items():
-        if device_data["type"] == "shades":
+    @callback
+    def async_add_new_devices() -> None:
+        """Add cover entities for shades that do not have one yet."""
+        entities = []
+        for device_id, device_data in coordinator.devices.items():
+            if device_data["type"] != "shades" or device_id in added:
+                continue
+            added.add(device_id)
             entities.append(
                 VermeShadeCover(
                     coordinator,
@@ -46,8 +53,14 @@ async def async_setup_entry(
                     config_entry.entry_id
                 )
             )
+        if entities:
+            async_add_entities(entities)
     
-    async_add_entities(entities)
+    # Create entities for every shade discovered so far, then for each new one
+    async_add_new_devices()
+    config_entry.async_on_unload(
+        async_dispatcher_connect(hass, coordinator.signal_new_device, async_add_new_devices)
+    )
 
 
 class VermeShadeCover(CoverEntity):
@@ -72,22 +85,32 @@ class VermeShadeCover(CoverEntity):
         self._topic_base = device_data["topic_base"]
         self._position_topic = f"{self._topic_base}/{MQTT_POSITION_SUFFIX}"
         self._state_topic = f"{self._topic_base}/{MQTT_STATE_SUFFIX}"
-        
-        # Subscribe to state updates if available
-        if coordinator.mqtt_client:
-            coordinator.mqtt_client.subscribe(self._state_topic)
-            coordinator.mqtt_client.message_callback_add(
-                self._state_topic,
-                self._on_state_message
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to state updates once the entity is added."""
+        # Messages are handled on the event loop
+        self.async_on_remove(
+            self._coordinator.subscribe(self._state_topic, self._handle_state_message)
+        )
+        # The coordinator updates device data in place; re-render on changes
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_DEVICE_UPDATED.format(
+                    entry_id=self._config_entry_id, device_id=self._device_id
+                ),
+                self.async_write_ha_state,
             )
+        )
     
-    def _on_state_message(self, client, userdata, msg):
+    @callback
+    def _handle_state_message(self, msg) -> None:
         """Handle state update messages."""
         try:
             position = int(msg.payload.decode())
             if 0 <= position <= 100:
                 self._current_position = position
-                self.schedule_update_ha_state()
+                self.async_write_ha_state()
         except (ValueError, TypeError):
             _LOGGER.warning("Invalid position value received: %s", msg.payload)
     
@@ -0,0 +1,240 @@
+"""Asyncio MQTT broker probe for Verme Automation.
+
+The config flow uses this module to check a broker without blocking the
+event loop or a worker thread. It speaks just enough MQTT 3.1.1 to connect,
+wait for CONNACK, subscribe to the Verme node discovery topic and count the
+retained node announcements.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import ssl
+import struct
+import time
+import uuid
+
+from .const import MQTT_BASE_TOPIC, MQTT_NODE_SUFFIX
+
+# MQTT control packet types (upper nibble of the fixed header)
+_CONNECT = 0x10
+_CONNACK = 0x20
+_PUBLISH = 0x30
+_SUBSCRIBE = 0x82
+_SUBACK = 0x90
+_DISCONNECT = 0xE0
+
+# CONNACK return codes that mean the broker rejected our credentials
+_CONNACK_AUTH_CODES = (4, 5)
+
+_PROBE_PACKET_ID = 1
+
+# Time kept back from the overall timeout to send DISCONNECT and close
+_CLOSE_MARGIN = 0.5
+
+
+class ProbeError(Exception):
+    """Error to indicate the broker could not be probed."""
+
+
+class ProbeAuthError(ProbeError):
+    """Error to indicate the broker rejected the credentials."""
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of a successful broker probe."""
+
+    connect_latency: float
+    round_trip_latency: float
+    retained_nodes: int
+    node_topics_allowed: bool = True
+
+
+def _encode_length(length: int) -> bytes:
+    """Encode an MQTT remaining length."""
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _encode_string(value: str) -> bytes:
+    """Encode a length-prefixed UTF-8 string."""
+    raw = value.encode()
+    return struct.pack("!H", len(raw)) + raw
+
+
+def _packet(header: int, body: bytes) -> bytes:
+    """Build a complete MQTT packet."""
+    return bytes((header,)) + _encode_length(len(body)) + body
+
+
+def _connect_packet(
+    client_id: str, username: str | None, password: str | None, keepalive: int
+) -> bytes:
+    """Build a clean-session CONNECT packet."""
+    flags = 0x02
+    payload = _encode_string(client_id)
+    if username:
+        flags |= 0x80
+        payload += _encode_string(username)
+        if password:
+            flags |= 0x40
+            payload += _encode_string(password)
+    body = _encode_string("MQTT") + struct.pack("!BBH", 4, flags, keepalive)
+    return _packet(_CONNECT, body + payload)
+
+
+def _subscribe_packet(packet_id: int, topic: str) -> bytes:
+    """Build a QoS 0 SUBSCRIBE packet for a single topic."""
+    return _packet(_SUBSCRIBE, struct.pack("!H", packet_id) + _encode_string(topic) + b"\x00")
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """Read one MQTT packet and return its fixed header byte and body."""
+    header = (await reader.readexactly(1))[0]
+    length = 0
+    multiplier = 1
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+        if multiplier > 128**3:
+            raise ProbeError("Malformed remaining length from broker")
+    return header, await reader.readexactly(length)
+
+
+async def _async_probe(
+    host: str,
+    port: int,
+    username: str | None,
+    password: str | None,
+    ssl_context: ssl.SSLContext | None,
+    timeout: float,
+    retained_window: float,
+    retained_limit: float,
+) -> ProbeResult:
+    """Run the probe; ``timeout`` only bounds the retained collection."""
+    started = time.monotonic()
+    reader, writer = await asyncio.open_connection(
+        host, port, ssl=ssl_context, server_hostname=host if ssl_context else None
+    )
+    try:
+        client_id = f"verme-probe-{uuid.uuid4().hex[:8]}"
+        writer.write(_connect_packet(client_id, username, password, keepalive=10))
+        await writer.drain()
+
+        header, body = await _read_packet(reader)
+        if header & 0xF0 != _CONNACK or len(body) != 2:
+            raise ProbeError(f"Expected CONNACK, got packet 0x{header:02x}")
+        if body[1] in _CONNACK_AUTH_CODES:
+            raise ProbeAuthError(f"Broker refused credentials (rc={body[1]})")
+        if body[1]:
+            raise ProbeError(f"Broker refused connection (rc={body[1]})")
+        connect_latency = time.monotonic() - started
+
+        # The SUBSCRIBE/SUBACK exchange doubles as the first round-trip measurement
+        sent = time.monotonic()
+        writer.write(
+            _subscribe_packet(_PROBE_PACKET_ID, f"{MQTT_BASE_TOPIC}/+/+/{MQTT_NODE_SUFFIX}")
+        )
+        await writer.drain()
+
+        round_trip_latency: float | None = None
+        node_topics_allowed = True
+        retained_topics: set[str] = set()
+        while round_trip_latency is None:
+            header, body = await _read_packet(reader)
+            if header == _SUBACK and body[:2] == struct.pack("!H", _PROBE_PACKET_ID):
+                # 0x80 is an ACL refusal; the credentials themselves were accepted
+                node_topics_allowed = body[2:3] != b"\x80"
+                round_trip_latency = time.monotonic() - sent
+            elif header & 0xF0 == _PUBLISH:
+                _collect_retained(header, body, retained_topics)
+
+        # Retained messages follow the SUBACK; stop once the broker goes quiet,
+        # the collection budget is spent or the overall timeout draws near,
+        # and report whatever was counted so far
+        # Short timeouts keep at most half of themselves back for closing
+        close_margin = min(_CLOSE_MARGIN, timeout / 2)
+        deadline = min(
+            time.monotonic() + retained_limit, started + timeout - close_margin
+        )
+        while node_topics_allowed and (remaining := deadline - time.monotonic()) > 0:
+            try:
+                header, body = await asyncio.wait_for(
+                    _read_packet(reader), min(retained_window, remaining)
+                )
+            except asyncio.TimeoutError:
+                break
+            if header & 0xF0 == _PUBLISH:
+                _collect_retained(header, body, retained_topics)
+
+        writer.write(_packet(_DISCONNECT, b""))
+        await writer.drain()
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+    return ProbeResult(
+        connect_latency, round_trip_latency, len(retained_topics), node_topics_allowed
+    )
+
+
+def _collect_retained(header: int, body: bytes, retained_topics: set[str]) -> None:
+    """Record the topic of a retained, non-empty PUBLISH packet."""
+    if not header & 0x01 or len(body) < 2:
+        return
+    (topic_length,) = struct.unpack("!H", body[:2])
+    payload_offset = 2 + topic_length
+    if (header >> 1) & 0x03:
+        payload_offset += 2  # packet identifier
+    if len(body) > payload_offset:
+        retained_topics.add(body[2 : 2 + topic_length].decode(errors="replace"))
+
+
+async def async_probe_broker(
+    host: str,
+    port: int,
+    username: str | None = None,
+    password: str | None = None,
+    ssl_context: ssl.SSLContext | None = None,
+    timeout: float = 10.0,
+    retained_window: float = 1.0,
+    retained_limit: float = 5.0,
+) -> ProbeResult:
+    """Probe an MQTT broker and report latency and retained Verme nodes.
+
+    Retained node announcements are counted until the broker has been quiet
+    for ``retained_window`` seconds, ``retained_limit`` seconds have passed
+    or ``timeout`` is about to expire. If the broker refuses the node topic
+    subscription, no nodes are counted and ``node_topics_allowed`` is False.
+    Raises ProbeAuthError when the broker rejects the credentials and
+    ProbeError for any other failure, including exceeding ``timeout``.
+    """
+    try:
+        return await asyncio.wait_for(
+            _async_probe(
+                host,
+                port,
+                username,
+                password,
+                ssl_context,
+                timeout,
+                retained_window,
+                retained_limit,
+            ),
+            timeout,
+        )
+    except asyncio.TimeoutError as err:
+        raise ProbeError(f"Timed out probing {host}:{port}") from err
+    except (OSError, ssl.SSLError, asyncio.IncompleteReadError) as err:
+        raise ProbeError(f"Failed to probe {host}:{port}: {err}") from err
@@ -0,0 +1,93 @@
+"""Sampling profiler for Verme Automation MQTT callbacks."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class HandlerStats:
+    """Timing statistics collected for one MQTT handler."""
+
+    calls: int = 0
+    total_time: float = 0.0
+    worst_time: float = 0.0
+    worst_loop_lag: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics in milliseconds for reporting."""
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_time * 1000, 3),
+            "mean_ms": round(self.total_time * 1000 / self.calls, 3) if self.calls else 0.0,
+            "worst_ms": round(self.worst_time * 1000, 3),
+            "worst_loop_lag_ms": round(self.worst_loop_lag * 1000, 3),
+        }
+
+
+class CallbackProfiler:
+    """Sample the duration and event-loop lag of MQTT callbacks.
+
+    Loop lag is the time between the paho thread queueing a message and
+    the event loop running its handler. Only every ``sample_rate``-th
+    callback is timed, so profiling can stay on under load.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the profiler in the disabled state."""
+        self.enabled = False
+        self.sample_rate = 1
+        self.stats: dict[str, HandlerStats] = {}
+        self.worst_loop_lag = 0.0
+        self.worst_batch_size = 0
+        self._counter = 0
+
+    def configure(self, enabled: bool, sample_rate: int = 1) -> None:
+        """Enable or disable sampling and reset collected statistics."""
+        self.enabled = enabled
+        self.sample_rate = max(1, sample_rate)
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all collected statistics."""
+        self.stats = {}
+        self.worst_loop_lag = 0.0
+        self.worst_batch_size = 0
+        self._counter = 0
+
+    def should_sample(self) -> bool:
+        """Return True if the next callback should be timed."""
+        if not self.enabled:
+            return False
+        self._counter += 1
+        return self._counter % self.sample_rate == 0
+
+    def record_batch(self, size: int) -> None:
+        """Record the number of messages drained from the hand-off queue at once."""
+        if self.enabled and size > self.worst_batch_size:
+            self.worst_batch_size = size
+
+    def record(self, name: str, duration: float, loop_lag: float) -> None:
+        """Record one sampled callback."""
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = HandlerStats()
+        stats.calls += 1
+        stats.total_time += duration
+        if duration > stats.worst_time:
+            stats.worst_time = duration
+        if loop_lag > stats.worst_loop_lag:
+            stats.worst_loop_lag = loop_lag
+        if loop_lag > self.worst_loop_lag:
+            self.worst_loop_lag = loop_lag
+
+    def report(self, top: int = 10) -> dict[str, Any]:
+        """Return the hottest handlers ordered by total time spent."""
+        hottest = sorted(self.stats.items(), key=lambda item: item[1].total_time, reverse=True)
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "worst_loop_lag_ms": round(self.worst_loop_lag * 1000, 3),
+            "worst_batch_size": self.worst_batch_size,
+            "handlers": {name: stats.as_dict() for name, stats in hottest[:top]},
+        }
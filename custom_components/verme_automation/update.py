@@ -11,6 +11,7 @@ from homeassistant.components.update import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import DeviceInfo
 import json
@@ -19,6 +20,7 @@ from .const import (
     DOMAIN,
     MANUFACTURER,
     MODEL_SHADE,
+    SIGNAL_DEVICE_UPDATED,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -31,20 +33,32 @@ async def async_setup_entry(
 ) -> None:
     """Set up Verme update entities from a config entry."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    added: set[str] = set()
     
-    # Create update entities for all discovered devices
-    entities = []
-    for device_id, device_data in coordinator.devices.items():
-        entities.append(
-            VermeUpdateEntity(
-                coordinator,
-                device_id,
-                device_data,
-                config_entry.entry_id
+    @callback
+    def async_add_new_devices() -> None:
+        """Add update entities for devices that do not have one yet."""
+        entities = []
+        for device_id, device_data in coordinator.devices.items():
+            if device_id in added:
+                continue
+            added.add(device_id)
+            entities.append(
+                VermeUpdateEntity(
+                    coordinator,
+                    device_id,
+                    device_data,
+                    config_entry.entry_id
+                )
             )
-        )
+        if entities:
+            async_add_entities(entities)
     
-    async_add_entities(entities)
+    # Create entities for every device discovered so far, then for each new one
+    async_add_new_devices()
+    config_entry.async_on_unload(
+        async_dispatcher_connect(hass, coordinator.signal_new_device, async_add_new_devices)
+    )
 
 
 class VermeUpdateEntity(UpdateEntity):
@@ -78,21 +92,42 @@ class VermeUpdateEntity(UpdateEntity):
         self._progress = 0
         self._release_notes = None
         self._last_status = {}
-        
-        # Subscribe to update topics
-        if coordinator.mqtt_client:
-            coordinator.mqtt_client.subscribe(self._update_status_topic)
-            coordinator.mqtt_client.subscribe(self._update_available_topic)
-            coordinator.mqtt_client.message_callback_add(
-                self._update_status_topic,
-                self._on_status_message
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to update topics once the entity is added."""
+        # Messages are handled on the event loop
+        self.async_on_remove(
+            self._coordinator.subscribe(self._update_status_topic, self._handle_status_message)
+        )
+        self.async_on_remove(
+            self._coordinator.subscribe(
+                self._update_available_topic, self._handle_available_message
             )
-            coordinator.mqtt_client.message_callback_add(
-                self._update_available_topic,
-                self._on_available_message
+        )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_DEVICE_UPDATED.format(
+                    entry_id=self._config_entry_id, device_id=self._device_id
+                ),
+                self._handle_device_updated,
             )
+        )
+    
+    @callback
+    def _handle_device_updated(self) -> None:
+        """Refresh the installed version after the node re-announces itself."""
+        self._installed_version = self._device_data["info"].get(
+            "version", self._installed_version
+        )
+        if self._latest_version == self._installed_version:
+            self._update_available = False
+            self._latest_version = None
+            self._release_notes = None
+        self.async_write_ha_state()
     
-    def _on_status_message(self, client, userdata, msg):
+    @callback
+    def _handle_status_message(self, msg) -> None:
         """Handle update status messages."""
         try:
             status = json.loads(msg.payload.decode())
@@ -109,12 +144,13 @@ class VermeUpdateEntity(UpdateEntity):
                 self._update_available = False
                 self._latest_version = None
             
-            self.schedule_update_ha_state()
+            self.async_write_ha_state()
             
         except (json.JSONDecodeError, KeyError) as err:
             _LOGGER.warning("Invalid update status message: %s", err)
     
-    def _on_available_message(self, client, userdata, msg):
+    @callback
+    def _handle_available_message(self, msg) -> None:
         """Handle update available messages."""
         try:
             available_info = json.loads(msg.payload.decode())
@@ -128,7 +164,7 @@ class VermeUpdateEntity(UpdateEntity):
                 self._latest_version = None
                 self._release_notes = None
             
-            self.schedule_update_ha_state()
+            self.async_write_ha_state()
             
         except (json.JSONDecodeError, KeyError) as err:
             _LOGGER.warning("Invalid update available message: %s", err)
@@ -0,0 +1 @@
+"""Tests for the Verme Automation integration."""
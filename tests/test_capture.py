@@ -0,0 +1,185 @@
+"""Tests for MQTT traffic capture and replay."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import time
+
+import pytest
+
+from custom_components.verme_automation import capture
+
+
+def _write(
+    path: Path,
+    records: list[tuple[int, str, bytes | str, bool]],
+    max_bytes: int = 1 << 20,
+    backups: int = 3,
+) -> None:
+    """Write records to a capture file."""
+    writer = capture.CaptureWriter(str(path), max_bytes, backups)
+    for record in records:
+        writer.record(*record)
+    writer.close()
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    """Records read back with topic, payload, direction and retain intact."""
+    path = tmp_path / "capture.bin"
+    _write(
+        path,
+        [
+            (capture.DIRECTION_IN, "verme/shades/shade_1/node", b'{"name": "Shade"}', True),
+            (capture.DIRECTION_OUT, "verme/shades/shade_1/position", "42", True),
+            (capture.DIRECTION_IN, "verme/shades/shade_1/state", b"", False),
+        ],
+    )
+
+    records = capture.read_capture(str(path))
+
+    assert [(r.direction, r.topic, r.payload, r.retain) for r in records] == [
+        (capture.DIRECTION_IN, "verme/shades/shade_1/node", b'{"name": "Shade"}', True),
+        (capture.DIRECTION_OUT, "verme/shades/shade_1/position", b"42", True),
+        (capture.DIRECTION_IN, "verme/shades/shade_1/state", b"", False),
+    ]
+    assert records[0].timestamp <= records[-1].timestamp
+    assert records[0].qos == 0
+
+
+def test_appends_to_existing_capture(tmp_path: Path) -> None:
+    """Reopening a capture appends without a second header."""
+    path = tmp_path / "capture.bin"
+    _write(path, [(capture.DIRECTION_IN, "a", b"1", False)])
+    _write(path, [(capture.DIRECTION_IN, "b", b"2", False)])
+
+    assert [r.topic for r in capture.read_capture(str(path))] == ["a", "b"]
+
+
+def test_records_are_readable_before_close(tmp_path: Path) -> None:
+    """Every record is flushed, so a live capture can be read."""
+    path = tmp_path / "capture.bin"
+    writer = capture.CaptureWriter(str(path), 1 << 20, 1)
+    writer.record(capture.DIRECTION_IN, "verme/shades/shade_1/state", b"10", False)
+
+    assert len(capture.read_capture(str(path))) == 1
+    writer.close()
+
+
+def test_rotation_keeps_backups(tmp_path: Path) -> None:
+    """Files rotate at max_bytes and only the configured backups are kept."""
+    path = tmp_path / "capture.bin"
+    _write(
+        path,
+        [(capture.DIRECTION_IN, f"topic/{index:02d}", b"x" * 20, False) for index in range(20)],
+        max_bytes=200,
+        backups=2,
+    )
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["capture.bin", "capture.bin.1", "capture.bin.2"]
+    for name in files:
+        assert (tmp_path / name).stat().st_size <= 200
+
+    # Backups hold older records, and together the files end with the newest
+    topics = [
+        r.topic
+        for name in ("capture.bin.2", "capture.bin.1", "capture.bin")
+        for r in capture.read_capture(str(tmp_path / name))
+    ]
+    assert topics == sorted(topics)
+    assert topics[-1] == "topic/19"
+
+
+def test_rotation_without_backups(tmp_path: Path) -> None:
+    """With no backups the capture is truncated instead of rotated."""
+    path = tmp_path / "capture.bin"
+    _write(
+        path,
+        [(capture.DIRECTION_IN, f"topic/{index:02d}", b"x" * 20, False) for index in range(20)],
+        max_bytes=200,
+        backups=0,
+    )
+
+    assert [p.name for p in tmp_path.iterdir()] == ["capture.bin"]
+    assert capture.read_capture(str(path))[-1].topic == "topic/19"
+
+
+def test_truncated_final_record_is_dropped(tmp_path: Path) -> None:
+    """A record cut short by a crash is ignored."""
+    path = tmp_path / "capture.bin"
+    _write(
+        path,
+        [
+            (capture.DIRECTION_IN, "first", b"payload", False),
+            (capture.DIRECTION_IN, "second", b"payload", False),
+        ],
+    )
+    path.write_bytes(path.read_bytes()[:-3])
+
+    assert [r.topic for r in capture.read_capture(str(path))] == ["first"]
+
+
+def test_rejects_foreign_file(tmp_path: Path) -> None:
+    """Files without the capture header are rejected."""
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a capture")
+
+    with pytest.raises(ValueError):
+        capture.read_capture(str(path))
+
+
+def _records(
+    offsets: list[float], direction: int = capture.DIRECTION_IN
+) -> list[capture.CaptureRecord]:
+    """Build records spaced by the given offsets in seconds."""
+    return [
+        capture.CaptureRecord(1000.0 + offset, direction, f"topic/{index}", b"", False)
+        for index, offset in enumerate(offsets)
+    ]
+
+
+def _replay(records: list[capture.CaptureRecord], speed: float) -> tuple[int, list[float]]:
+    """Replay records and return the count and dispatch times relative to start."""
+    dispatched: list[float] = []
+
+    async def run() -> int:
+        started = time.monotonic()
+        return await capture.async_replay(
+            records, lambda record: dispatched.append(time.monotonic() - started), speed
+        )
+
+    return asyncio.run(run()), dispatched
+
+
+def test_replay_only_inbound() -> None:
+    """Outbound records are not dispatched."""
+    records = _records([0.0]) + _records([0.0], capture.DIRECTION_OUT)
+
+    count, dispatched = _replay(records, 0)
+
+    assert count == 1
+    assert len(dispatched) == 1
+
+
+def test_replay_as_fast_as_possible() -> None:
+    """Speed 0 ignores the recorded gaps."""
+    count, dispatched = _replay(_records([0.0, 5.0, 10.0]), 0)
+
+    assert count == 3
+    assert dispatched[-1] < 0.5
+
+
+def test_replay_real_time() -> None:
+    """Speed 1 reproduces the recorded gaps."""
+    count, dispatched = _replay(_records([0.0, 0.2, 0.4]), 1)
+
+    assert count == 3
+    assert dispatched[1] == pytest.approx(0.2, abs=0.1)
+    assert dispatched[2] == pytest.approx(0.4, abs=0.1)
+
+
+def test_replay_speed_multiplier() -> None:
+    """Higher speeds shrink the recorded gaps."""
+    _, dispatched = _replay(_records([0.0, 0.8]), 4)
+
+    assert dispatched[1] == pytest.approx(0.2, abs=0.1)
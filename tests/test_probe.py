@@ -0,0 +1,196 @@
+"""Tests for the asyncio MQTT broker probe."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import struct
+import time
+
+import pytest
+
+from custom_components.verme_automation import probe
+
+NODE_TOPIC = "verme/shades/shade_{}/node"
+
+BrokerHandler = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+
+
+def _publish(topic: str, payload: bytes, retain: bool = True, qos: int = 0) -> bytes:
+    """Build a PUBLISH packet as a broker would send it."""
+    header = probe._PUBLISH | (qos << 1) | (0x01 if retain else 0x00)
+    body = probe._encode_string(topic)
+    if qos:
+        body += struct.pack("!H", 7)
+    return probe._packet(header, body + payload)
+
+
+def _broker(
+    connack_rc: int = 0,
+    suback_code: bytes = b"\x00",
+    retained: list[bytes] | None = None,
+    flood_interval: float | None = None,
+) -> BrokerHandler:
+    """Return a fake broker connection handler."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            header, _ = await probe._read_packet(reader)
+            assert header == probe._CONNECT
+            writer.write(probe._packet(probe._CONNACK, bytes((0, connack_rc))))
+            await writer.drain()
+            if connack_rc:
+                return
+
+            header, body = await probe._read_packet(reader)
+            assert header == probe._SUBSCRIBE
+            writer.write(probe._packet(probe._SUBACK, body[:2] + suback_code))
+            for packet in retained or []:
+                writer.write(packet)
+            await writer.drain()
+
+            count = 0
+            while flood_interval is not None:
+                writer.write(_publish(NODE_TOPIC.format(count), b"{}"))
+                await writer.drain()
+                count += 1
+                await asyncio.sleep(flood_interval)
+            await reader.read()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+def _run_probe(handler: BrokerHandler, **kwargs) -> probe.ProbeResult:
+    """Start a fake broker and probe it."""
+
+    async def run() -> probe.ProbeResult:
+        server = await asyncio.start_server(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await probe.async_probe_broker("127.0.0.1", port, "user", "pass", **kwargs)
+        finally:
+            server.close()
+
+    return asyncio.run(run())
+
+
+def test_probe_counts_retained_nodes() -> None:
+    """Retained, non-empty node announcements are counted once per topic."""
+    result = _run_probe(
+        _broker(
+            retained=[
+                _publish(NODE_TOPIC.format(1), b"{}"),
+                _publish(NODE_TOPIC.format(1), b"{}"),
+                _publish(NODE_TOPIC.format(2), b"{}", qos=1),
+                _publish(NODE_TOPIC.format(3), b""),
+                _publish(NODE_TOPIC.format(4), b"{}", retain=False),
+            ]
+        ),
+        retained_window=0.2,
+    )
+
+    assert result.retained_nodes == 2
+    assert result.node_topics_allowed
+    assert result.connect_latency >= 0
+    assert result.round_trip_latency >= 0
+
+
+@pytest.mark.parametrize("rc", [4, 5])
+def test_probe_rejected_credentials(rc: int) -> None:
+    """CONNACK codes 4 and 5 are reported as authentication failures."""
+    with pytest.raises(probe.ProbeAuthError):
+        _run_probe(_broker(connack_rc=rc))
+
+
+def test_probe_refused_connection() -> None:
+    """Other CONNACK refusals are plain probe errors."""
+    with pytest.raises(probe.ProbeError) as err:
+        _run_probe(_broker(connack_rc=3))
+    assert not isinstance(err.value, probe.ProbeAuthError)
+
+
+def test_probe_subscription_refused() -> None:
+    """A SUBACK failure is an ACL refusal, not bad credentials."""
+    result = _run_probe(
+        _broker(suback_code=b"\x80", retained=[_publish(NODE_TOPIC.format(1), b"{}")]),
+        retained_window=0.2,
+    )
+
+    assert not result.node_topics_allowed
+    assert result.retained_nodes == 0
+
+
+def test_probe_flood_returns_partial_count_before_timeout() -> None:
+    """A broker that never goes quiet still yields the nodes counted so far."""
+    started = time.monotonic()
+    result = _run_probe(
+        _broker(flood_interval=0.02), timeout=1.5, retained_window=0.5, retained_limit=10
+    )
+
+    assert result.retained_nodes > 0
+    assert time.monotonic() - started < 1.5
+
+
+def test_probe_short_timeout_still_collects() -> None:
+    """Timeouts below the close margin do not leave a deadline in the past."""
+    result = _run_probe(
+        _broker(retained=[_publish(NODE_TOPIC.format(1), b"{}")]),
+        timeout=probe._CLOSE_MARGIN,
+        retained_window=0.1,
+    )
+
+    assert result.retained_nodes == 1
+
+
+def test_probe_malformed_remaining_length() -> None:
+    """A remaining length longer than four bytes is rejected."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await probe._read_packet(reader)
+        writer.write(bytes((probe._CONNACK, 0xFF, 0xFF, 0xFF, 0xFF, 0x01)))
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    with pytest.raises(probe.ProbeError, match="Malformed"):
+        _run_probe(handle)
+
+
+def test_remaining_length_round_trip() -> None:
+    """Multi-byte remaining lengths decode to the encoded value."""
+
+    async def run() -> tuple[int, bytes]:
+        reader = asyncio.StreamReader()
+        reader.feed_data(probe._packet(probe._PUBLISH, b"x" * 20000))
+        reader.feed_eof()
+        return await probe._read_packet(reader)
+
+    assert probe._encode_length(20000) == b"\xa0\x9c\x01"
+    header, body = asyncio.run(run())
+    assert header == probe._PUBLISH
+    assert len(body) == 20000
+
+
+@pytest.mark.parametrize(
+    ("qos", "payload", "counted"),
+    [(0, b"{}", True), (0, b"", False), (1, b"{}", True), (1, b"", False), (2, b"{}", True)],
+)
+def test_collect_retained_packet_id_offset(qos: int, payload: bytes, counted: bool) -> None:
+    """The packet identifier of QoS 1/2 messages is not mistaken for payload."""
+    packet = _publish(NODE_TOPIC.format(1), payload, qos=qos)
+    header, body = packet[0], packet[2:]
+    topics: set[str] = set()
+
+    probe._collect_retained(header, body, topics)
+
+    assert (NODE_TOPIC.format(1) in topics) is counted
+
+
+def test_collect_retained_short_body() -> None:
+    """Truncated PUBLISH bodies are ignored."""
+    topics: set[str] = set()
+    probe._collect_retained(probe._PUBLISH | 0x01, b"\x00", topics)
+    assert not topics